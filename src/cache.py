@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+import time
+from typing import Any, Optional
+from config import get_settings
+
+settings = get_settings()
+
+
+# Busy timeout and attempts for writes whose failure must be reported
+REQUIRED_WRITE_TIMEOUT_MS = 2000
+REQUIRED_WRITE_ATTEMPTS = 3
+
+
+class CacheWriteError(Exception):
+    pass
+
+
+def default_cache_dir():
+    # /dev/shm is a tmpfs, so the store lives in shared memory on Linux hosts
+    base_path = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    # Separate deployments run by the same user must not share a store
+    instance = hashlib.sha256(
+        f"{settings.db_transaction_url}:{settings.port}".encode()
+    ).hexdigest()[:12]
+    return os.path.join(base_path, f"fastapi-raw-sql-{os.getuid()}-{instance}")
+
+
+def ensure_private_dir(path: str):
+    """
+    Create the cache directory readable only by the service user and refuse
+    to use one that another user owns or can write to.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    dir_stat = os.lstat(path)
+    if not stat.S_ISDIR(dir_stat.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    if dir_stat.st_uid != os.getuid() or dir_stat.st_mode & 0o077:
+        raise PermissionError(f"{path} must be owned by this user with mode 0700")
+
+
+class SharedCache:
+    """
+    Key/value store shared by every worker process on the host.
+
+    Values are JSON encoded and kept in a SQLite file so that concurrent
+    workers get proper locking without running a separate cache server.
+    Any error, including a held write lock, is treated as a cache miss so
+    callers fall back to the database instead of blocking the event loop.
+    """
+
+    def __init__(self, directory: str, ttl: int, enabled: bool = True):
+        self.directory = directory
+        self.path = os.path.join(directory, "cache.db")
+        self.ttl = ttl
+        self.enabled = enabled
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self):
+        # Opened lazily; uvicorn spawns its workers, so each one re-imports
+        # this module and opens its own handle
+        if not self.enabled:
+            raise sqlite3.OperationalError("shared cache is disabled")
+        if self._connection is None:
+            try:
+                ensure_private_dir(self.directory)
+                connection = sqlite3.connect(
+                    self.path, timeout=0.05, isolation_level=None
+                )
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS cache "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+            except (OSError, sqlite3.Error) as msg:
+                print(f"Shared cache disabled: {msg}")
+                self.enabled = False
+                raise sqlite3.OperationalError(str(msg))
+            self._connection = connection
+        return self._connection
+
+    def get(self, key: str) -> Any:
+        try:
+            row = self.connection.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def required_write(self, write):
+        """
+        Run write(connection) in a transaction with a longer busy timeout,
+        retrying on failure. Raises CacheWriteError if every attempt fails.
+        """
+        error = None
+        for _ in range(REQUIRED_WRITE_ATTEMPTS):
+            try:
+                connection = self.connection
+                connection.execute(
+                    f"PRAGMA busy_timeout = {REQUIRED_WRITE_TIMEOUT_MS}"
+                )
+                try:
+                    with connection:
+                        connection.execute("BEGIN IMMEDIATE")
+                        return write(connection)
+                finally:
+                    connection.execute("PRAGMA busy_timeout = 50")
+            except sqlite3.Error as msg:
+                error = msg
+        raise CacheWriteError(str(error))
+
+    def generation(self, key: str) -> Optional[int]:
+        """
+        Current value of a counter bumped by incr(), 0 if it was never bumped
+        and None if the store could not be read.
+        """
+        try:
+            row = self.connection.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return 0 if row is None else int(row[0])
+
+    def incr(self, key: str) -> int:
+        # Counters never expire; they are only reset by clear()
+        def write(connection):
+            connection.execute(
+                "INSERT INTO cache (key, value, expires_at) VALUES (?, '1', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+                (key, float("inf")),
+            )
+            return int(
+                connection.execute(
+                    "SELECT value FROM cache WHERE key = ?", (key,)
+                ).fetchone()[0]
+            )
+
+        return self.required_write(write)
+
+    def set(self, key: str, value: Any):
+        self.set_many({key: value})
+
+    def set_many(self, items: dict, required: bool = False):
+        expires_at = time.time() + self.ttl
+
+        def write(connection):
+            connection.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                [
+                    (key, json.dumps(value, default=str), expires_at)
+                    for key, value in items.items()
+                ],
+            )
+
+        if required:
+            self.required_write(write)
+            return
+        try:
+            with self.connection:
+                self.connection.execute("BEGIN IMMEDIATE")
+                write(self.connection)
+        except sqlite3.Error:
+            pass
+
+    def add(self, key: str, value: Any):
+        """
+        Store the value only if the key is missing or expired.
+        Returns True when this call claimed the key.
+        """
+        try:
+            with self.connection:
+                self.connection.execute("BEGIN IMMEDIATE")
+                self.connection.execute(
+                    "DELETE FROM cache WHERE key = ? AND expires_at <= ?",
+                    (key, time.time()),
+                )
+                cursor = self.connection.execute(
+                    "INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, default=str), time.time() + self.ttl),
+                )
+        except sqlite3.Error:
+            return False
+        return cursor.rowcount == 1
+
+    def delete(self, key: str, required: bool = False):
+        def write(connection):
+            connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+        if required:
+            self.required_write(write)
+            return
+        try:
+            write(self.connection)
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        ensure_private_dir(self.directory)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+
+cache = SharedCache(
+    settings.cache_dir or default_cache_dir(),
+    settings.cache_ttl,
+    enabled=settings.production_mode,
+)
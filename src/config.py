@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseSettings, PostgresDsn
 from functools import lru_cache
 from dotenv import load_dotenv
@@ -11,6 +12,15 @@ class Settings(BaseSettings):
     jwt_secret: str
     algorithm: str
     jwt_expire_time: int
+    host: str = "0.0.0.0"
+    port: int = 5000
+    workers: int = 1
+    pool_size: int = 5
+    production_mode: bool = False
+    cache_dir: Optional[str] = None
+    cache_ttl: int = 300
+    parameter_cache_ttl: int = 10
+    warm_up_timeout: int = 30
 
     class Config:
         env_file = ".env"
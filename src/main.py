@@ -14,11 +14,14 @@ from services import (
     view_table_columns,
     generate_report,
     download_report,
+    warm_up,
 )
 from fastapi import Header
 import uvicorn
 from schemas import LoginData, ReqBody
+from config import get_settings
 
+settings = get_settings()
 app = FastAPI()
 
 app.add_middleware(
@@ -30,6 +33,14 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def startup():
+    # Runs in every worker before it starts accepting requests; the dev
+    # server skips it so it can start without the databases
+    if settings.production_mode:
+        await warm_up(settings.pool_size)
+
+
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request, exc):
     return JSONResponse(
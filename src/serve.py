@@ -0,0 +1,24 @@
+import os
+
+# Set before the settings are read; spawned workers inherit it
+os.environ["PRODUCTION_MODE"] = "true"
+
+import uvicorn
+from config import get_settings
+from cache import cache
+
+settings = get_settings()
+
+
+if __name__ == "__main__":
+    # Drop cache state left behind by a previous run before spawning workers
+    cache.clear()
+    uvicorn.run(
+        "main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.workers,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+    )
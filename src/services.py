@@ -1,8 +1,12 @@
+import asyncio
 import datetime
 from functools import reduce
 import os
 from typing import Optional
+import time
 from database import db_parameter_engine, db_transaction_engine, TbParameters
+from cache import cache, CacheWriteError
+from config import get_settings
 from sqlalchemy import text, select, inspect
 from sqlalchemy.exc import (
     SQLAlchemyError,
@@ -12,6 +16,7 @@ from sqlalchemy.exc import (
     ProgrammingError,
 )
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 from schemas import ReqBody, TbParameterRead, LoginData
 from docxtpl import DocxTemplate
 from utils import (
@@ -26,6 +31,29 @@ from docxtpl import InlineImage
 from docx.shared import Mm
 import re
 
+settings = get_settings()
+schema_changing_commands = ("alter", "drop")
+# Bumped after every schema change; schema keys include it so entries read
+# before the change can no longer be served
+schema_generation_key = "schema:generation"
+# Access rules stay in each worker's memory, never in the shared cache
+parameter_cache = {}
+
+
+def get_cached_parameter(table_name: str):
+    cached = parameter_cache.get(table_name)
+    if cached is None or cached[0] <= time.monotonic():
+        return None
+    return cached[1]
+
+
+def set_cached_parameter(table_name: str, db_data: dict):
+    if settings.production_mode:
+        parameter_cache[table_name] = (
+            time.monotonic() + settings.parameter_cache_ttl,
+            db_data,
+        )
+
 
 async def extract_table_name(statement: str):
     transformed_statement = statement.replace("\n", " ")
@@ -47,6 +75,9 @@ async def extract_table_name(statement: str):
 
 
 async def get_db_parameter(table_name: str):
+    db_data = get_cached_parameter(table_name)
+    if db_data is not None:
+        return db_data
     statement = select(TbParameters).where(TbParameters.tablename == table_name)
     async with db_parameter_engine.connect() as connection:
         try:
@@ -65,6 +96,7 @@ async def get_db_parameter(table_name: str):
             dict(zip(TbParameterRead.__fields__.keys(), data_db))  # type: ignore
         ).dict()
     }
+    set_cached_parameter(table_name, db_data)
 
     return db_data
 
@@ -103,6 +135,14 @@ async def execute_sql_command(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Something went wrong",
             )
+    if command.lower() in schema_changing_commands and cache.enabled:
+        try:
+            cache.incr(schema_generation_key)
+        except CacheWriteError:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"{command} was executed but the schema cache could not be refreshed",
+            )
     return True
 
 
@@ -178,11 +218,18 @@ async def login_user(data: LoginData):
 
 
 async def view_db_tables():
+    generation = cache.generation(schema_generation_key)
+    if generation is not None:
+        tables = cache.get(f"schema:{generation}:tables")
+        if tables is not None:
+            return tables
     async with db_transaction_engine.begin() as connection:
         try:
             tables = await connection.run_sync(
                 lambda sync_conn: inspect(sync_conn).get_table_names()
             )
+            if generation is not None:
+                cache.set(f"schema:{generation}:tables", tables)
             return tables
         except SQLAlchemyError:
             raise HTTPException(
@@ -192,6 +239,11 @@ async def view_db_tables():
 
 
 async def view_table_columns(table_name: str):
+    generation = cache.generation(schema_generation_key)
+    if generation is not None:
+        db_columns = cache.get(f"schema:{generation}:columns:{table_name}")
+        if db_columns is not None:
+            return db_columns
     async with db_transaction_engine.begin() as connection:
         try:
             columns = await connection.run_sync(
@@ -201,6 +253,8 @@ async def view_table_columns(table_name: str):
                 {"name": column.get("name"), "type": str(column.get("type"))}
                 for column in columns
             ]
+            if generation is not None:
+                cache.set(f"schema:{generation}:columns:{table_name}", db_columns)
             return db_columns
         except SQLAlchemyError as msg:
             if isinstance(msg, NoSuchTableError):
@@ -315,3 +369,85 @@ async def download_report(report_name: str):
         os.path.join(report_base_path, report_name),
         media_type=media_types.get(report_type, "docx"),
     )
+
+
+async def warm_up_pool(engine, size: int):
+    async def checkout():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(checkout() for _ in range(size)))
+
+
+def inspect_schema(sync_conn):
+    inspector = inspect(sync_conn)
+    return {
+        table_name: inspector.get_columns(table_name)
+        for table_name in inspector.get_table_names()
+    }
+
+
+async def load_parameters():
+    async with db_parameter_engine.connect() as connection:
+        results = await connection.execute(select(TbParameters))
+        for row in results:
+            try:
+                db_data = TbParameterRead.parse_obj(
+                    dict(zip(TbParameterRead.__fields__.keys(), row))
+                ).dict()
+            except ValidationError as msg:
+                # Requests for this table fail on their own; keep starting up
+                print(f"Skipping invalid tb_parameter row {row[0]}: {msg}")
+                continue
+            set_cached_parameter(db_data["tablename"], db_data)
+
+
+async def load_schema():
+    generation = cache.generation(schema_generation_key)
+    if generation is None:
+        raise CacheWriteError("unable to read the schema generation")
+    async with db_transaction_engine.connect() as connection:
+        schema = await connection.run_sync(inspect_schema)
+    items = {f"schema:{generation}:tables": list(schema.keys())}
+    for table_name, columns in schema.items():
+        items[f"schema:{generation}:columns:{table_name}"] = [
+            {"name": column.get("name"), "type": str(column.get("type"))}
+            for column in columns
+        ]
+    items["warmup_done"] = True
+    cache.set_many(items, required=True)
+
+
+async def warm_up_schema(timeout: int):
+    """
+    Load the transaction database schema into the shared cache. The worker
+    that claims the warm-up marker does the work; the others wait for it to
+    finish, up to the given timeout, and take over the claim if it is released.
+    """
+    deadline = time.monotonic() + timeout
+    while cache.enabled and time.monotonic() < deadline:
+        if cache.get("warmup_done"):
+            return
+        if cache.add("warmup", True):
+            try:
+                await load_schema()
+            except Exception as msg:
+                print(f"Schema warm-up failed: {msg}")
+                try:
+                    cache.delete("warmup", required=True)
+                except CacheWriteError:
+                    pass
+            return
+        await asyncio.sleep(0.1)
+    if cache.enabled:
+        print("Schema warm-up did not finish in time, starting with a cold cache")
+
+
+async def warm_up(pool_size: int):
+    await asyncio.gather(
+        warm_up_pool(db_parameter_engine, pool_size),
+        warm_up_pool(db_transaction_engine, pool_size),
+    )
+    await warm_up_schema(settings.warm_up_timeout)
+    # Loaded last so the entries are fresh when the worker starts serving
+    await load_parameters()